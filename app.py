@@ -1,12 +1,16 @@
 import streamlit as st
+import hashlib
 import os
+import requests
+import sqlite3
+import tempfile
 from typing import Optional, List
 from phi.assistant import Assistant
 from phi.storage.assistant.sqlite import SqliteAssistantStorage
-from phi.knowledge.pdf import PDFUrlKnowledgeBase
-from phi.vectordb.sqlite import SqliteVectorDb
-from phi.embedder.sentence_transformer import SentenceTransformerEmbedder
-from phi.model.groq import Groq
+from knowledge import BatchedPDFKnowledgeBase
+from vectordb import FaissVectorDb
+from phi.llm.groq import Groq
+from embedder import OnnxSentenceTransformerEmbedder
 from dotenv import load_dotenv
 import time
 
@@ -21,8 +25,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS for better styling
-st.markdown("""
+# Custom CSS for better styling (module constant so reruns reuse one string)
+_CSS = """
 <style>
     .main-header {
         font-size: 3rem;
@@ -33,30 +37,7 @@ st.markdown("""
         -webkit-text-fill-color: transparent;
         margin-bottom: 2rem;
     }
-    
-    .chat-message {
-        padding: 1rem;
-        border-radius: 10px;
-        margin: 1rem 0;
-        display: flex;
-        align-items: flex-start;
-    }
-    
-    .user-message {
-        background-color: #e3f2fd;
-        margin-left: 2rem;
-    }
-    
-    .assistant-message {
-        background-color: #f5f5f5;
-        margin-right: 2rem;
-    }
-    
-    .stTextArea textarea {
-        border-radius: 20px;
-        border: 2px solid #667eea;
-    }
-    
+
     .success-box {
         background-color: #d4edda;
         border: 1px solid #c3e6cb;
@@ -64,7 +45,7 @@ st.markdown("""
         padding: 10px;
         margin: 10px 0;
     }
-    
+
     .error-box {
         background-color: #f8d7da;
         border: 1px solid #f5c6cb;
@@ -73,7 +54,18 @@ st.markdown("""
         margin: 10px 0;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+@st.cache_data
+def _get_css() -> str:
+    return _CSS
+
+# st.html bypasses the markdown parser/sanitizer that st.markdown would
+# push the style block through on every rerun
+if hasattr(st, "html"):
+    st.html(_get_css())
+else:
+    st.markdown(_get_css(), unsafe_allow_html=True)
 
 # Initialize session state
 if 'messages' not in st.session_state:
@@ -85,29 +77,94 @@ if 'knowledge_base_loaded' not in st.session_state:
 if 'current_user' not in st.session_state:
     st.session_state.current_user = 'default_user'
 
-@st.cache_resource
+@st.cache_data(ttl=3600)
+def _fetch_pdf(url: str) -> bytes:
+    """Download the PDF once per URL so embedding retries skip the round-trip.
+
+    raise_for_status keeps failed responses out of the cache — a raising
+    cached function isn't memoized, so the next Load PDF retries the
+    download instead of reusing error-page bytes.
+    """
+    response = requests.get(url, timeout=60)
+    response.raise_for_status()
+    return response.content
+
+@st.cache_resource(hash_funcs={bytes: lambda b: hashlib.sha256(b).hexdigest()})
+def _build_knowledge_base(pdf_bytes: bytes):
+    """Build the knowledge base for a PDF, keyed by the hash of its bytes.
+
+    The db file is named after the content hash, so the same PDF loaded
+    under a different URL (or after a restart) reuses the embeddings
+    already on disk instead of re-embedding.
+    """
+    digest = hashlib.sha256(pdf_bytes).hexdigest()
+    db_file = f"pdf_{digest}.db"
+
+    pdf_path = os.path.join(tempfile.gettempdir(), f"pdf_{digest}.pdf")
+    if not os.path.exists(pdf_path):
+        with open(pdf_path, "wb") as f:
+            f.write(pdf_bytes)
+
+    knowledge_base = BatchedPDFKnowledgeBase(
+        path=pdf_path,
+        vector_db=FaissVectorDb(
+            table_name="pdf_vectors",
+            db_file=db_file,
+            embedder=OnnxSentenceTransformerEmbedder(model="all-MiniLM-L6-v2")
+        )
+    )
+
+    if not (os.path.exists(db_file) and knowledge_base.vector_db.load_from_disk()):
+        knowledge_base.load()
+
+    return knowledge_base, db_file
+
 def initialize_knowledge_base(pdf_url: str):
     """Initialize and load the knowledge base"""
     try:
-        db_file = "pdf_assistant_streamlit.db"
-        
-        knowledge_base = PDFUrlKnowledgeBase(
-            urls=[pdf_url],
-            vector_db=SqliteVectorDb(
-                table_name="pdf_vectors",
-                db_file=db_file,
-                embedder=SentenceTransformerEmbedder(model="all-MiniLM-L6-v2")
-            )
-        )
-        
+        pdf_bytes = _fetch_pdf(pdf_url)
+
         with st.spinner("Loading PDF and creating embeddings... This may take a few minutes."):
-            knowledge_base.load()
-        
-        return knowledge_base, db_file
+            return _build_knowledge_base(pdf_bytes)
     except Exception as e:
         st.error(f"Error loading knowledge base: {str(e)}")
         return None, None
 
+# Queries containing these need the large model's reasoning/summarization
+_COMPLEX_KEYWORDS = ("summarize", "summarise", "explain", "compare", "analyze", "analyse")
+
+def _groq_model(model_id: str):
+    """Build a fresh Groq LLM; construction is cheap and the client is lazy.
+
+    Not cached: phidata mutates the LLM (update_llm registers the
+    assistant's bound tool methods on it), so sharing one instance across
+    assistants or sessions would leave stale tools pointing at another
+    assistant's knowledge base and chat history.
+    """
+    return Groq(model=model_id, api_key=os.getenv('GROQ_API_KEY'))
+
+def _route_model(user_input: str):
+    """Route short factual queries to the fast 8B model; keep long or
+    analytical prompts on the 70B model"""
+    lowered = user_input.lower()
+    if len(user_input.split()) < 50 and not any(k in lowered for k in _COMPLEX_KEYWORDS):
+        return _groq_model("llama-3.1-8b-instant")
+    return _groq_model("llama-3.3-70b-versatile")
+
+@st.cache_resource
+def _tune_sqlite(db_file: str):
+    """Put the shared db in WAL mode so chat-log inserts stop paying a full
+    fsync and blocking concurrent readers. Runs once per session."""
+    conn = sqlite3.connect(db_file)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA cache_size=-65536")
+    finally:
+        conn.close()
+
 def initialize_assistant(knowledge_base, db_file, user_id: str):
     """Initialize the AI assistant"""
     try:
@@ -117,10 +174,11 @@ def initialize_assistant(knowledge_base, db_file, user_id: str):
             return None
             
         storage = SqliteAssistantStorage(
-            table_name='pdf_assistant_runs', 
+            table_name='pdf_assistant_runs',
             db_file=db_file
         )
-        
+        _tune_sqlite(db_file)
+
         # Get existing run ID or create new one
         existing_run_ids = storage.get_all_run_ids(user_id)
         run_id = existing_run_ids[0] if existing_run_ids else None
@@ -130,7 +188,7 @@ def initialize_assistant(knowledge_base, db_file, user_id: str):
             user_id=user_id,
             knowledge_base=knowledge_base,
             storage=storage,
-            model=Groq(id="llama-3.3-70b-versatile", api_key=groq_api_key),
+            llm=_groq_model("llama-3.3-70b-versatile"),
             show_tool_calls=True,
             search_knowledge=True,
             read_chat_history=True,
@@ -141,6 +199,93 @@ def initialize_assistant(knowledge_base, db_file, user_id: str):
         st.error(f"Error initializing assistant: {str(e)}")
         return None
 
+def _prune_chat_history(assistant):
+    """Fold the oldest turns of the assistant's memory into a one-paragraph
+    summary once it passes 20 messages, keeping per-turn prompt cost flat.
+
+    This targets assistant.memory.chat_history, which is what
+    read_chat_history exposes to the model — the st.session_state
+    transcript is only the rendered view and costs nothing to keep.
+    """
+    memory = getattr(assistant, "memory", None)
+    history = getattr(memory, "chat_history", None)
+    if history is None or len(history) <= 20:
+        return
+    oldest = history[:10]
+    transcript = "\n".join(f"{m.role}: {m.content}" for m in oldest)
+    try:
+        from groq import Groq as GroqClient
+
+        client = GroqClient(api_key=os.getenv('GROQ_API_KEY'))
+        completion = client.chat.completions.create(
+            model="llama-3.1-8b-instant",
+            messages=[{
+                "role": "user",
+                "content": (
+                    "Summarize this conversation in one short paragraph, "
+                    f"keeping any facts needed to continue it:\n{transcript}"
+                ),
+            }],
+            max_tokens=200,
+        )
+        summary = completion.choices[0].message.content
+    except Exception:
+        return  # pruning is best-effort; keep the full history on failure
+    from phi.llm.message import Message
+
+    memory.chat_history = [
+        Message(role="assistant", content=f"Summary of earlier conversation: {summary}")
+    ] + history[10:]
+    # persist the pruned history, or the next run's read_from_storage
+    # restores the full transcript from the db row
+    assistant.write_to_storage()
+
+# st.fragment limits chat turns to rerunning just the chat block instead of
+# the whole script (sidebar, header, status boxes)
+_fragment = st.fragment if hasattr(st, "fragment") else (lambda func: func)
+
+@_fragment
+def chat_ui():
+    """Chat transcript plus input; reruns in isolation on each message"""
+    # Display chat messages
+    chat_container = st.container()
+    with chat_container:
+        for message in st.session_state.messages:
+            with st.chat_message(message["role"]):
+                st.markdown(message["content"])
+
+    # Chat input
+    if st.session_state.assistant:
+        user_input = st.chat_input("Ask a question about the PDF...")
+
+        # Process user input
+        if user_input:
+            # Add user message to chat
+            st.session_state.messages.append({"role": "user", "content": user_input})
+
+            # Pick the model size for this turn before running
+            st.session_state.assistant.llm = _route_model(user_input)
+
+            with chat_container:
+                with st.chat_message("user"):
+                    st.markdown(user_input)
+
+                # Stream the assistant response so the first tokens show up
+                # at time-to-first-token instead of after full generation
+                with st.chat_message("assistant"):
+                    placeholder = st.empty()
+                    accumulated = ""
+                    try:
+                        for chunk in st.session_state.assistant.run(user_input, stream=True):
+                            accumulated += chunk if isinstance(chunk, str) else str(chunk)
+                            placeholder.markdown(accumulated)
+                        st.session_state.messages.append({"role": "assistant", "content": accumulated})
+                        _prune_chat_history(st.session_state.assistant)
+                    except Exception as e:
+                        error_message = f"Sorry, I encountered an error: {str(e)}"
+                        placeholder.markdown(error_message)
+                        st.session_state.messages.append({"role": "assistant", "content": error_message})
+
 def main():
     # Header
     st.markdown('<h1 class="main-header">🤖 AI PDF Assistant</h1>', unsafe_allow_html=True)
@@ -172,16 +317,19 @@ def main():
                     st.session_state.knowledge_base_loaded = True
                     st.session_state.assistant = None  # Reset assistant for new PDF
                     st.success("PDF loaded successfully!")
-                    st.rerun()
             else:
                 st.error("Please enter a PDF URL")
         
         # Clear chat button
         if st.button("🗑️ Clear Chat"):
             st.session_state.messages = []
-            st.session_state.assistant = None
+            # Keep the assistant (storage, Groq client) and only wipe its memory;
+            # persist the wipe, or the next run reloads the old history from storage
+            assistant = st.session_state.assistant
+            if assistant is not None and hasattr(assistant.memory, "clear"):
+                assistant.memory.clear()
+                assistant.write_to_storage()
             st.success("Chat cleared!")
-            st.rerun()
         
         # Status indicators
         st.subheader("📊 Status")
@@ -242,66 +390,9 @@ def main():
             st.session_state.current_user
         )
     
-    # Display chat messages
-    chat_container = st.container()
-    with chat_container:
-        for message in st.session_state.messages:
-            if message["role"] == "user":
-                st.markdown(f"""
-                <div class="chat-message user-message">
-                    <div>
-                        <strong>👤 You:</strong><br>
-                        {message["content"]}
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-            else:
-                st.markdown(f"""
-                <div class="chat-message assistant-message">
-                    <div>
-                        <strong>🤖 Assistant:</strong><br>
-                        {message["content"]}
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-    
-    # Chat input
-    if st.session_state.assistant:
-        # Use a form to handle enter key submission
-        with st.form(key="chat_form", clear_on_submit=True):
-            col1, col2 = st.columns([4, 1])
-            with col1:
-                user_input = st.text_area(
-                    "Ask a question about the PDF:",
-                    placeholder="Type your question here...",
-                    height=100,
-                    key="user_input"
-                )
-            with col2:
-                st.markdown("<br>", unsafe_allow_html=True)  # Add spacing
-                submit_button = st.form_submit_button("Send 📤", type="primary")
-        
-        # Process user input
-        if submit_button and user_input:
-            # Add user message to chat
-            st.session_state.messages.append({"role": "user", "content": user_input})
-            
-            # Get assistant response
-            with st.spinner("🤔 Thinking..."):
-                try:
-                    response = st.session_state.assistant.run(user_input)
-                    assistant_response = response.content if hasattr(response, 'content') else str(response)
-                    
-                    # Add assistant response to chat
-                    st.session_state.messages.append({"role": "assistant", "content": assistant_response})
-                    
-                except Exception as e:
-                    error_message = f"Sorry, I encountered an error: {str(e)}"
-                    st.session_state.messages.append({"role": "assistant", "content": error_message})
-            
-            # Rerun to update the chat display
-            st.rerun()
-    
+    # Chat transcript and input (fragment: reruns in isolation per message)
+    chat_ui()
+
     # Footer
     st.markdown("---")
     st.markdown("""
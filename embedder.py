@@ -0,0 +1,128 @@
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import streamlit as st
+from phi.embedder.sentence_transformer import SentenceTransformerEmbedder
+
+# Below this many texts the thread-pool fan-out costs more than it saves
+_PARALLEL_ENCODE_THRESHOLD = 256
+
+_torch_threads_set = False
+
+
+def _configure_torch_threads():
+    """Let the tokenizer/fallback torch backend use all cores (once per process)."""
+    global _torch_threads_set
+    if _torch_threads_set:
+        return
+    try:
+        import torch
+
+        torch.set_num_threads(os.cpu_count() or 1)
+    except ImportError:
+        pass
+    _torch_threads_set = True
+
+
+@st.cache_resource
+def _load_sentence_transformer(model_name: str, intra_op_threads: int = 0):
+    """Load the sentence-transformer once per process with the fastest CPU backend.
+
+    Prefers ONNX Runtime with int8 (AVX-512 VNNI) weights; falls back to
+    OpenVINO int8, then the default PyTorch backend if neither is available.
+    `intra_op_threads` > 0 pins the ORT pool to that size — used by the
+    sharded bulk-encode path so its workers don't oversubscribe the CPU,
+    while query-time encodes keep ORT's default of all cores.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    try:
+        import onnxruntime as ort
+
+        # Enable all graph fusions (LayerNorm/GELU/Attention) and the shared
+        # arena allocator for the hot embedding loop
+        sess_options = ort.SessionOptions()
+        sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        sess_options.enable_mem_pattern = True
+        sess_options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        sess_options.add_session_config_entry("session.use_env_allocators", "1")
+        if intra_op_threads > 0:
+            sess_options.intra_op_num_threads = intra_op_threads
+            sess_options.inter_op_num_threads = 1
+
+        return SentenceTransformer(
+            model_name,
+            backend="onnx",
+            model_kwargs={
+                "file_name": "onnx/model_qint8_avx512_vnni.onnx",
+                "provider": "CPUExecutionProvider",
+                "session_options": sess_options,
+            },
+        )
+    except Exception:
+        pass
+
+    try:
+        return SentenceTransformer(model_name, backend="openvino")
+    except Exception:
+        pass
+
+    return SentenceTransformer(model_name)
+
+
+@functools.lru_cache(maxsize=1024)
+def _encode_cached(model_name: str, text: str):
+    """Encode a single text, memoized so resubmitted queries skip the model"""
+    model = _load_sentence_transformer(model_name)
+    return tuple(model.encode(text, normalize_embeddings=True).tolist())
+
+
+class OnnxSentenceTransformerEmbedder(SentenceTransformerEmbedder):
+    """SentenceTransformerEmbedder backed by a quantized ONNX model on CPU.
+
+    `get_embeddings` encodes a whole list of texts in one batched call and
+    caches the results, so knowledge-base loading pays tokenizer/session
+    overhead once per batch instead of once per chunk.
+    """
+
+    _embedding_cache: Dict[str, List[float]] = {}
+
+    def get_embedding(self, text: str) -> List[float]:
+        cached = self._embedding_cache.get(text)
+        if cached is not None:
+            return cached
+        _configure_torch_threads()
+        return list(_encode_cached(self.model, text))
+
+    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        _configure_torch_threads()
+
+        workers = max((os.cpu_count() or 2) // 2, 1)
+        if len(texts) >= _PARALLEL_ENCODE_THRESHOLD and workers > 1:
+            # ORT releases the GIL inside session.run, so sharding the
+            # texts across threads keeps the remaining cores busy; the
+            # session is pinned to 2 intra-op threads so workers x pool
+            # matches the core count instead of oversubscribing it
+            model = _load_sentence_transformer(self.model, intra_op_threads=2)
+
+            def encode(shard: List[str]):
+                return model.encode(
+                    shard, batch_size=64, convert_to_numpy=True, normalize_embeddings=True
+                )
+
+            shard_size = -(-len(texts) // workers)
+            shards = [texts[i:i + shard_size] for i in range(0, len(texts), shard_size)]
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(encode, shards))
+            vectors = [vec for shard_vecs in results for vec in shard_vecs]
+        else:
+            model = _load_sentence_transformer(self.model)
+            vectors = model.encode(
+                texts, batch_size=64, convert_to_numpy=True, normalize_embeddings=True
+            )
+        embeddings = [vec.tolist() for vec in vectors]
+        for text, embedding in zip(texts, embeddings):
+            self._embedding_cache[text] = embedding
+        return embeddings
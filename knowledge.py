@@ -0,0 +1,86 @@
+import queue
+import threading
+from pathlib import Path
+
+from phi.document import Document
+from phi.knowledge.pdf import PDFKnowledgeBase
+
+_SENTINEL = object()
+
+
+class BatchedPDFKnowledgeBase(PDFKnowledgeBase):
+    """PDFKnowledgeBase that pipelines parsing and batched embedding.
+
+    A producer thread extracts and chunks the PDF one page at a time into
+    a small bounded queue, while the main thread batch-embeds and inserts
+    each page's chunks — so extracting page n+1 overlaps with embedding
+    page n. The parsed documents are inserted directly via
+    `load_documents`, instead of the stock path that would parse the PDF
+    a second time for the insert pass.
+    """
+
+    def _page_batches(self):
+        """Yield the chunked documents of one page at a time"""
+        from pypdf import PdfReader
+
+        path = Path(self.path)
+        doc_name = path.name.split(".")[0].replace(" ", "_")
+        for page_number, page in enumerate(PdfReader(str(path)).pages, start=1):
+            document = Document(
+                name=doc_name,
+                id=f"{doc_name}_{page_number}",
+                meta_data={"page": page_number},
+                content=page.extract_text() or "",
+            )
+            if getattr(self.reader, "chunk", False):
+                yield self.reader.chunk_document(document)
+            else:
+                yield [document]
+
+    def load(self, recreate: bool = False, upsert: bool = False, skip_existing: bool = True) -> None:
+        embedder = getattr(self.vector_db, "embedder", None)
+        path = Path(self.path) if self.path is not None else None
+        if (
+            embedder is None
+            or not hasattr(embedder, "get_embeddings")
+            or path is None
+            or not path.is_file()
+        ):
+            # directory corpora and plain embedders take the stock path
+            super().load(recreate=recreate, upsert=upsert, skip_existing=skip_existing)
+            self.vector_db.optimize()
+            return
+
+        if recreate:
+            self.vector_db.drop()
+        if not self.vector_db.exists():
+            self.vector_db.create()
+
+        batches: queue.Queue = queue.Queue(maxsize=4)
+        errors = []
+
+        def produce():
+            try:
+                for batch in self._page_batches():
+                    batches.put(batch)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                batches.put(_SENTINEL)
+
+        parser = threading.Thread(target=produce, daemon=True)
+        parser.start()
+        while True:
+            batch = batches.get()
+            if batch is _SENTINEL:
+                break
+            texts = [document.content for document in batch]
+            if texts:
+                embedder.get_embeddings(texts)
+            self.load_documents(batch, upsert=upsert, skip_existing=skip_existing)
+        parser.join()
+        if errors:
+            raise errors[0]
+        # AgentKnowledge.load never calls optimize(), which is where
+        # FaissVectorDb persists its index file, so trigger it here
+        self.vector_db.optimize()
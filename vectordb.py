@@ -0,0 +1,260 @@
+import json
+import os
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from phi.document import Document
+from phi.embedder import Embedder
+from phi.vectordb.base import VectorDb
+
+
+class FaissVectorDb(VectorDb):
+    """Vector store backed by a FAISS HNSW index.
+
+    Replaces the SQLite row-scan similarity search with a graph traversal
+    over FAISS's SIMD kernels. Chunk texts live in a small sqlite table
+    keyed by insertion order, matching the FAISS row ids.
+
+    Small corpora use an exact HNSW index; once the corpus crosses
+    `pq_threshold` vectors the index is rebuilt as IVFPQ (nlist=256, m=8,
+    nbits=8), compressing each vector ~16x and cutting search memory
+    traffic accordingly.
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        db_file: str,
+        embedder: Embedder,
+        dimensions: int = 384,
+        pq_threshold: int = 10000,
+    ):
+        self.table_name = table_name
+        self.db_file = db_file
+        self.index_file = f"{db_file}.faiss"
+        self.embedder = embedder
+        self.dimensions = dimensions
+        self.pq_threshold = pq_threshold
+        self._vectors: Optional[np.ndarray] = None
+        self._pq_active = False
+        self.index = self._new_flat_index()
+
+    def _new_flat_index(self):
+        import faiss
+
+        index = faiss.IndexHNSWFlat(self.dimensions, 32, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efSearch = 64
+        return index
+
+    def _build_pq_index(self, vectors: np.ndarray):
+        import faiss
+
+        nlist = 256
+        quantizer = faiss.IndexFlatIP(self.dimensions)
+        index = faiss.IndexIVFPQ(
+            quantizer, self.dimensions, nlist, 8, 8, faiss.METRIC_INNER_PRODUCT
+        )
+        index.train(vectors)
+        index.add(vectors)
+        index.nprobe = 16
+        return index
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_file)
+
+    def create(self) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table_name} "
+                "(id INTEGER PRIMARY KEY, name TEXT, content TEXT, meta_data TEXT, "
+                "embedding BLOB)"
+            )
+
+    def doc_exists(self, document: Document) -> bool:
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT 1 FROM {self.table_name} WHERE content = ? LIMIT 1",
+                (document.content,),
+            ).fetchone()
+        return row is not None
+
+    def name_exists(self, name: str) -> bool:
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT 1 FROM {self.table_name} WHERE name = ? LIMIT 1",
+                (name,),
+            ).fetchone()
+        return row is not None
+
+    def insert(
+        self,
+        documents: List[Document],
+        filters: Optional[Dict[str, Any]] = None,
+        batch_size: int = 10,
+    ) -> None:
+        import faiss
+
+        if not documents:
+            return
+        for document in documents:
+            if document.embedding is None:
+                document.embed(embedder=self.embedder)
+        vectors = np.array([d.embedding for d in documents], dtype=np.float32)
+        faiss.normalize_L2(vectors)
+        if self._pq_active:
+            self.index.add(vectors)
+        else:
+            self._vectors = (
+                vectors
+                if self._vectors is None
+                else np.vstack([self._vectors, vectors])
+            )
+            if len(self._vectors) >= self.pq_threshold:
+                # crossed the threshold: rebuild the flat index as IVFPQ and
+                # drop the FP32 buffer — the FP16 blobs in sqlite are the
+                # rebuild source from here on
+                self.index = self._build_pq_index(self._vectors)
+                self._pq_active = True
+                self._vectors = None
+            else:
+                self.index.add(vectors)
+        with self._connect() as conn:
+            conn.executemany(
+                f"INSERT INTO {self.table_name} (name, content, meta_data, embedding) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (
+                        document.name,
+                        document.content,
+                        json.dumps(document.meta_data or {}),
+                        # FP16 halves the blob size at <=1e-3 cosine error
+                        vector.astype(np.float16).tobytes(),
+                    )
+                    for document, vector in zip(documents, vectors)
+                ],
+            )
+
+    def load_from_disk(self) -> bool:
+        """Reopen a persisted index, or rebuild it from the FP16 blobs in sqlite.
+
+        Returns True when stored vectors were found, so callers can skip
+        re-embedding the PDF entirely. The written index file is preferred
+        and memory-mapped, so pages are only faulted in as queries touch
+        them; the sqlite blobs are the fallback.
+        """
+        import faiss
+
+        if not self.exists():
+            return False
+        if os.path.exists(self.index_file):
+            try:
+                self.index = faiss.read_index(
+                    self.index_file, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+                )
+                self._pq_active = isinstance(self.index, faiss.IndexIVFPQ)
+                if self._pq_active:
+                    self.index.nprobe = 16
+                else:
+                    # read_index leaves efSearch at the faiss default of 16
+                    self.index.hnsw.efSearch = 64
+                return True
+            except Exception:
+                pass  # fall back to rebuilding from the sqlite blobs
+        with self._connect() as conn:
+            blobs = [
+                row[0]
+                for row in conn.execute(
+                    f"SELECT embedding FROM {self.table_name} ORDER BY id"
+                )
+                if row[0] is not None
+            ]
+        if not blobs:
+            return False
+        vectors = np.vstack(
+            [np.frombuffer(blob, dtype=np.float16).astype(np.float32) for blob in blobs]
+        )
+        faiss.normalize_L2(vectors)
+        if len(vectors) >= self.pq_threshold:
+            self.index = self._build_pq_index(vectors)
+            self._pq_active = True
+            self._vectors = None
+        else:
+            self.index = self._new_flat_index()
+            self.index.add(vectors)
+            self._vectors = vectors
+        return True
+
+    def upsert(
+        self,
+        documents: List[Document],
+        filters: Optional[Dict[str, Any]] = None,
+        batch_size: int = 10,
+    ) -> None:
+        self.insert(documents, filters=filters, batch_size=batch_size)
+
+    def search(
+        self, query: str, limit: int = 5, filters: Optional[Dict[str, Any]] = None
+    ) -> List[Document]:
+        import faiss
+
+        if self.index.ntotal == 0:
+            return []
+        query_vector = np.array(
+            [self.embedder.get_embedding(query)], dtype=np.float32
+        )
+        faiss.normalize_L2(query_vector)
+        _, ids = self.index.search(query_vector, limit)
+        row_ids = [int(i) + 1 for i in ids[0] if i >= 0]
+        if not row_ids:
+            return []
+        placeholders = ",".join("?" * len(row_ids))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT id, name, content, meta_data FROM {self.table_name} "
+                f"WHERE id IN ({placeholders})",
+                row_ids,
+            ).fetchall()
+        by_id = {row[0]: row for row in rows}
+        return [
+            Document(
+                name=by_id[row_id][1],
+                content=by_id[row_id][2],
+                meta_data=json.loads(by_id[row_id][3] or "{}"),
+            )
+            for row_id in row_ids
+            if row_id in by_id
+        ]
+
+    def drop(self) -> None:
+        with self._connect() as conn:
+            conn.execute(f"DROP TABLE IF EXISTS {self.table_name}")
+        if os.path.exists(self.index_file):
+            os.remove(self.index_file)
+        self._vectors = None
+        self._pq_active = False
+        self.index = self._new_flat_index()
+
+    def delete(self) -> bool:
+        self.drop()
+        return True
+
+    def exists(self) -> bool:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                (self.table_name,),
+            ).fetchone()
+        return row is not None
+
+    def optimize(self) -> None:
+        # called by the knowledge base once loading finishes
+        import faiss
+
+        if self.index.ntotal > 0:
+            faiss.write_index(self.index, self.index_file)
+
+    def clear(self) -> bool:
+        self.drop()
+        self.create()
+        return True